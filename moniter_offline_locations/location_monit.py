@@ -1,60 +1,107 @@
 #!/usr/bin/env python3
 
 import asyncio
-import subprocess
-import csv
-import json
+import ipaddress
 import logging
+import os
+import shutil
+import socket
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import signal
 import sys
 
+import orjson
+import pandas as pd
+from icmplib import ICMPv4Socket, SocketPermissionError, async_multiping
+
+try:
+    import uvloop  # Faster event loop, not available on Windows
+except ImportError:
+    uvloop = None
+
 
 class SimpleNetworkMonitor:
-    def __init__(self, csv_file: str, ping_interval: int = 30):
+    def __init__(self, csv_file: str, ping_interval: int = 30, max_concurrent_pings: int = 64):
         self.devices = self._load_devices(csv_file)
         self.ping_interval = ping_interval
+        self.max_concurrent_pings = max_concurrent_pings  # Bound in-flight pings
+        # Root can use raw ICMP sockets; everyone else needs unprivileged
+        # datagram sockets (icmplib always uses raw sockets on Windows)
+        self._privileged = hasattr(os, 'geteuid') and os.geteuid() == 0
         self.device_states = {}  # Track current online/offline state
-        self.outage_data = {}    # Track outages per location
+        self._online_count = 0   # Number of True entries in device_states
+        self.outage_data = defaultdict(list)  # Track outages per location
         self.active_outages = {} # Track ongoing outages
-        self.shutdown_requested = False
+        self._shutdown_event = None  # asyncio.Event, created on the running loop
         self.current_day = None  # Track what day we're monitoring
+        self._event_fp = None    # Append-only outage event log for current day
         
         self._setup_logging()
-        self._setup_signal_handlers()
+        self._ping_method = self._detect_ping_method()  # 'icmplib', 'fping' or 'ping'
         self._initialize_day_data()
     
     def _format_timestamp(self, dt: datetime) -> str:
         """Format datetime to readable string format"""
         return dt.strftime("%m/%d/%Y %H:%M:%S")
     
-    def _parse_timestamp(self, timestamp_str: str) -> datetime:
-        """Parse timestamp string back to datetime object"""
-        try:
-            return datetime.strptime(timestamp_str, "%m/%d/%Y %H:%M:%S")
-        except ValueError:
-            # Fallback for old ISO format data
-            return datetime.fromisoformat(timestamp_str.replace('T', ' ').split('.')[0])
-    
     def _load_devices(self, csv_file: str) -> Dict[str, str]:
         """Load devices from CSV file - returns {ip: location}"""
         devices = {}
         try:
-            with open(csv_file, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    location = row['location'].strip()
-                    ip = row['device'].strip()
-                    devices[ip] = location
+            # keep_default_na=False: a location called "NA" or "None" is just a name
+            df = pd.read_csv(csv_file, usecols=['device', 'location'], dtype=str,
+                             encoding='utf-8', keep_default_na=False)
+            ips = df['device'].str.strip()
+            locations = df['location'].str.strip()
+            filled = (ips != '') & (locations != '')  # Skip rows with an empty cell
+            devices = self._resolve_devices(list(zip(ips[filled], locations[filled])))
             print(f"Loaded {len(devices)} devices for monitoring")
         except Exception as e:
             print(f"Error loading devices: {e}")
             raise
         return devices
     
+    def _resolve_devices(self, entries: List[Tuple[str, str]]) -> Dict[str, str]:
+        """Resolve (device, location) entries to {ip: location} once at startup,
+        so pings never do DNS lookups
+        
+        Entries that cannot be resolved, or that resolve to an IP already
+        taken by an earlier entry, are skipped with a warning.
+        """
+        def resolve(entry: Tuple[str, str]) -> Optional[str]:
+            host, location = entry
+            try:
+                return str(ipaddress.ip_address(host))  # Already an IP - just normalize it
+            except ValueError:
+                pass
+            
+            try:
+                addresses = socket.getaddrinfo(host, None, family=socket.AF_INET)
+                return addresses[0][4][0]
+            except OSError as e:
+                print(f"Skipping device {host} ({location}): could not resolve it ({e})")
+                return None
+        
+        # Blocking lookups, run side by side so many hostnames don't add up
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            resolved = list(executor.map(resolve, entries))
+        
+        devices = {}
+        for (host, location), ip in zip(entries, resolved):
+            if ip is None:
+                continue
+            if ip in devices:
+                print(f"Skipping device {host} ({location}): {ip} is already monitored for {devices[ip]}")
+                continue
+            devices[ip] = location
+        return devices
+    
     def _setup_logging(self):
         """Setup basic logging"""
         log_dir = Path("logs")
@@ -70,42 +117,155 @@ class SimpleNetworkMonitor:
         )
     
     def _setup_signal_handlers(self):
-        """Handle shutdown signals"""
-        def signal_handler(signum, frame):
+        """Handle shutdown signals - must be called from the running loop"""
+        loop = asyncio.get_running_loop()
+        
+        def request_shutdown():
             print("\nShutdown requested...")
-            self.shutdown_requested = True
+            self._shutdown_event.set()
         
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, request_shutdown)
+            except NotImplementedError:
+                # Windows event loops don't support add_signal_handler
+                signal.signal(signum, lambda *args: loop.call_soon_threadsafe(request_shutdown))
     
     def _initialize_day_data(self):
         """Initialize data for current day"""
         today = datetime.now().strftime('%Y%m%d')
         self.current_day = today
         
-        # Load existing data for today
+        # A crash skips the shutdown/rollover compaction of earlier days
+        self._compact_previous_days()
+        
+        legacy_data = None
+        # Load existing data for today - the event log is the source of truth
+        events_file = Path(f"outages/events_{today}.jsonl")
         data_file = Path(f"outages/outages_{today}.json")
         
-        if data_file.exists():
+        if events_file.exists():
             try:
-                with open(data_file, 'r') as f:
-                    self.outage_data = json.load(f)
+                self.outage_data = self._replay_events(events_file)
+                print(f"Loaded existing events for {today}")
+            except Exception as e:
+                print(f"Error loading existing events: {e}")
+                self.outage_data = defaultdict(list)
+        elif data_file.exists():
+            try:
+                with open(data_file, 'rb') as f:
+                    self.outage_data = defaultdict(list, orjson.loads(f.read()))
+                legacy_data = self.outage_data
                 print(f"Loaded existing data for {today}")
             except Exception as e:
                 print(f"Error loading existing data: {e}")
-                self.outage_data = {}
+                self.outage_data = defaultdict(list)
         else:
-            self.outage_data = {}
+            self.outage_data = defaultdict(list)
             print(f"Starting fresh monitoring for {today}")
+        
+        self._open_event_log()
+        
+        # Data from a summary without an event log (written before event
+        # logs existed) must go into the log, or the next restart loses it
+        if legacy_data:
+            for location, outages in legacy_data.items():
+                for record in outages:
+                    self._append_event({'event': 'record', 'location': location, **record})
     
-    def _check_day_rollover(self):
+    def _compact_previous_days(self):
+        """Compact event logs of earlier days whose summary is missing or stale"""
+        for events_file in sorted(Path("outages").glob("events_*.jsonl")):
+            day = events_file.stem[len("events_"):]
+            if day >= self.current_day:
+                continue
+            
+            data_file = events_file.with_name(f"outages_{day}.json")
+            if data_file.exists() and data_file.stat().st_mtime >= events_file.stat().st_mtime:
+                continue
+            
+            try:
+                self._write_summary(data_file, self._replay_events(events_file))
+                print(f"Compacted leftover events for {day}")
+            except Exception as e:
+                print(f"Error compacting events for {day}: {e}")
+    
+    def _replay_events(self, events_file: Path) -> Dict[str, List[dict]]:
+        """Rebuild outage data from the day's event log"""
+        outage_data = defaultdict(list)
+        open_records = {}  # ip -> record of its latest unfinished outage
+        
+        with open(events_file, 'rb') as f:
+            for line in f:
+                try:
+                    event = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # Blank or partially written line
+                
+                if event['event'] == 'offline':
+                    record = {
+                        'offline_at': event['offline_at'],
+                        'online_at': None,
+                        'offline_for': event['offline_for']
+                    }
+                    outage_data[event['location']].append(record)
+                    open_records[event['ip']] = record
+                
+                elif event['event'] == 'online':
+                    record = open_records.pop(event['ip'], None)
+                    if record is not None:
+                        record['online_at'] = event['online_at']
+                        record['offline_for'] = event['offline_for']
+                
+                elif event['event'] == 'record':
+                    # Complete record imported from a legacy summary file
+                    outage_data[event['location']].append({
+                        'offline_at': event['offline_at'],
+                        'online_at': event['online_at'],
+                        'offline_for': event['offline_for']
+                    })
+        
+        return outage_data
+    
+    def _open_event_log(self):
+        """Open the current day's event log for appending"""
+        self._close_event_log()
+        
+        outages_dir = Path("outages")
+        outages_dir.mkdir(exist_ok=True)
+        self._event_fp = open(outages_dir / f"events_{self.current_day}.jsonl", 'ab')
+
+        # A crash mid-write can leave a torn last line; terminate it so the
+        # next event starts on its own line instead of being lost with it
+        if self._event_fp.tell() > 0:
+            with open(self._event_fp.name, 'rb') as fp:
+                fp.seek(-1, os.SEEK_END)
+                if fp.read(1) != b"\n":
+                    self._event_fp.write(b"\n")
+                    self._event_fp.flush()
+
+    def _close_event_log(self):
+        """Close the event log if it is open"""
+        if self._event_fp is not None:
+            self._event_fp.close()
+            self._event_fp = None
+    
+    def _append_event(self, event: dict):
+        """Append a single outage event to the day's event log"""
+        try:
+            self._event_fp.write(orjson.dumps(event) + b"\n")
+            self._event_fp.flush()
+        except Exception as e:
+            logging.error("Error writing event: %s", e)
+    
+    def _check_day_rollover(self, now: datetime):
         """Check if we've rolled over to a new day and reset data if needed"""
-        today = datetime.now().strftime('%Y%m%d')
+        today = now.strftime('%Y%m%d')
         
         if today != self.current_day:
             print(f"\n🗓️  Day rollover detected: {self.current_day} -> {today}")
             
-            # Save final data for the previous day
+            # Compact the previous day's events into its summary file
             self._save_daily_data()
             
             # Handle any active outages - they continue into the new day
@@ -117,24 +277,22 @@ class SimpleNetworkMonitor:
                 for ip, outage_info in self.active_outages.items():
                     continuing_outages[ip] = {
                         'location': outage_info['location'],
-                        'offline_timestamp': outage_info['offline_timestamp'],
-                        'offline_at': outage_info['offline_at']
+                        'offline_monotonic': outage_info['offline_monotonic'],
+                        'offline_at': outage_info['offline_at'],
+                        'offline_dt': outage_info['offline_dt']
                     }
             
             # Reset for new day
             self.current_day = today
-            self.outage_data = {}
+            self.outage_data = defaultdict(list)
             self.active_outages = {}
+            self._open_event_log()
             
             # Re-create active outages for new day
             if 'continuing_outages' in locals():
                 for ip, outage_info in continuing_outages.items():
                     location = outage_info['location']
                     
-                    # Initialize location data if needed
-                    if location not in self.outage_data:
-                        self.outage_data[location] = []
-                    
                     # Create new outage record for new day
                     outage_record = {
                         'offline_at': outage_info['offline_at'],  # Original time from previous day
@@ -143,12 +301,20 @@ class SimpleNetworkMonitor:
                     }
                     
                     self.outage_data[location].append(outage_record)
+                    self._append_event({
+                        'event': 'offline',
+                        'ip': ip,
+                        'location': location,
+                        'offline_at': outage_record['offline_at'],
+                        'offline_for': outage_record['offline_for']
+                    })
                     
                     # Restore to active outages
                     self.active_outages[ip] = {
                         'location': location,
                         'offline_at': outage_info['offline_at'],
-                        'offline_timestamp': outage_info['offline_timestamp'],
+                        'offline_dt': outage_info['offline_dt'],
+                        'offline_monotonic': outage_info['offline_monotonic'],
                         'record_index': len(self.outage_data[location]) - 1
                     }
             
@@ -156,162 +322,267 @@ class SimpleNetworkMonitor:
             self._setup_logging()
             print(f"✅ Successfully reset for new day: {today}")
     
-    async def _ping_device(self, ip: str) -> bool:
-        """Ping a device and return True if online"""
+    def _detect_ping_method(self) -> str:
+        """Pick how to ping - 'icmplib', or 'fping'/'ping' without ICMP socket permission"""
         try:
-            cmd = ["ping", "-c", "1", "-W", "3", ip]
-            result = await asyncio.create_subprocess_exec(
+            ICMPv4Socket(privileged=self._privileged).close()
+            return 'icmplib'
+        except SocketPermissionError:
+            pass
+        
+        # One fping process per cycle, else the baseline ping per device
+        for method in ('fping', 'ping'):
+            if shutil.which(method):
+                logging.warning("No permission for ICMP sockets, using %s instead", method)
+                return method
+        
+        raise RuntimeError("Cannot ping: no permission for ICMP sockets and neither fping nor ping is installed")
+    
+    async def _ping_devices(self, ips: List[str], count: int = 1) -> Dict[str, bool]:
+        """Ping devices in one batch - returns {ip: is_online}
+        
+        Each device gets up to count pings and is online if any is answered.
+        """
+        if self._ping_method == 'fping':
+            return await self._fping_devices(ips, count)
+        if self._ping_method == 'ping':
+            return await self._command_ping_devices(ips, count)
+        
+        try:
+            hosts = await async_multiping(
+                ips, count=count, interval=0.5, timeout=1,
+                concurrent_tasks=self.max_concurrent_pings,
+                privileged=self._privileged
+            )
+            return {ip: host.is_alive for ip, host in zip(ips, hosts)}
+        except Exception as e:
+            # Socket permission was checked at startup, so this is unexpected;
+            # skip the cycle rather than record outages that may not be real
+            logging.error("Batch ping failed, skipping this cycle: %s", e)
+            return {}
+    
+    async def _fping_devices(self, ips: List[str], count: int = 1) -> Dict[str, bool]:
+        """Ping devices with a single fping process - returns {ip: is_online}
+        
+        Same policy as the icmplib batch: up to count pings (count - 1
+        retries, 1s timeout each) per device. Returns {} if fping cannot
+        be run, so no device changes state.
+        """
+        cmd = ["fping", "-a", "-q", "-r", str(count - 1), "-t", "1000", "-B", "1", *ips]
+        try:
+            proc = await asyncio.create_subprocess_exec(
                 *cmd,
-                stdout=asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.DEVNULL
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
-            await result.wait()
-            return result.returncode == 0
-        except Exception:
-            return False
+            stdout, stderr = await proc.communicate()
+        except Exception as e:
+            logging.error("fping failed: %s", e)
+            return {}
+        
+        # fping exits 1 if some hosts are unreachable and 2 if some names
+        # could not be resolved; anything higher is a real failure
+        if proc.returncode > 2:
+            logging.error("fping failed: %s", stderr.decode(errors='replace').strip())
+            return {}
+        
+        # With -a, fping prints the targets that answered, one per line
+        alive = set(stdout.decode().split())
+        return {ip: ip in alive for ip in ips}
     
-    async def _confirm_offline(self, ip: str) -> bool:
-        """Double-check if device is really offline after 2 seconds"""
-        print(f"Confirming offline status for {self.devices[ip]} ({ip})...")
-        await asyncio.sleep(2)
-        
-        # Try 3 times to be sure
-        for i in range(3):
-            if await self._ping_device(ip):
-                print(f"False alarm - {self.devices[ip]} ({ip}) is actually online")
+    async def _command_ping_devices(self, ips: List[str], count: int = 1) -> Dict[str, bool]:
+        """Ping devices with one system ping process each - returns {ip: is_online}
+        
+        Last resort when neither ICMP sockets nor fping are available.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_pings)
+        
+        async def ping_device(ip: str) -> bool:
+            if sys.platform == 'win32':
+                cmd = ["ping", "-n", str(count), "-w", "1000", ip]
+            else:
+                cmd = ["ping", "-c", str(count), "-W", "1", ip]
+            try:
+                async with semaphore:
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd,
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.DEVNULL
+                    )
+                    return await proc.wait() == 0
+            except Exception:
                 return False
-            await asyncio.sleep(1)
         
-        print(f"Confirmed - {self.devices[ip]} ({ip}) is offline")
-        return True
+        results = await asyncio.gather(*(ping_device(ip) for ip in ips))
+        return dict(zip(ips, results))
     
     def _format_duration(self, seconds: float) -> str:
         """Format duration in human readable format"""
-        if seconds < 60:
-            return f"{int(seconds)} seconds"
-        elif seconds < 3600:
-            minutes = int(seconds // 60)
-            secs = int(seconds % 60)
+        return self._format_whole_seconds(int(seconds))
+    
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _format_whole_seconds(seconds: int) -> str:
+        """Format a whole number of seconds - cached, durations repeat a lot"""
+        minutes, secs = divmod(seconds, 60)
+        if not minutes:
+            return f"{secs} seconds"
+        hours, minutes = divmod(minutes, 60)
+        if not hours:
             return f"{minutes} minutes {secs} seconds"
-        else:
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            secs = int(seconds % 60)
-            return f"{hours} hours {minutes} minutes {secs} seconds"
+        return f"{hours} hours {minutes} minutes {secs} seconds"
     
-    def _record_outage_start(self, ip: str, location: str):
-        """Record when a device goes offline"""
-        now = datetime.now()
-        
-        # Initialize location data if needed
-        if location not in self.outage_data:
-            self.outage_data[location] = []
-        
+    def _record_outage_start(self, ip: str, location: str, now: datetime, now_str: str, now_monotonic: float):
+        """Record when a device goes offline at cycle time now (now_str formatted)"""
         # Create outage record immediately (with ongoing status)
         outage_record = {
-            'offline_at': self._format_timestamp(now),
+            'offline_at': now_str,
             'online_at': None,  # Still offline
             'offline_for': 'ONGOING'
         }
         
         # Add to outage data immediately
         self.outage_data[location].append(outage_record)
+        self._append_event({
+            'event': 'offline',
+            'ip': ip,
+            'location': location,
+            'offline_at': outage_record['offline_at'],
+            'offline_for': outage_record['offline_for']
+        })
         
         # Record active outage with reference to the record index
         self.active_outages[ip] = {
             'location': location,
-            'offline_at': self._format_timestamp(now),
-            'offline_timestamp': now.timestamp(),
+            'offline_at': now_str,
+            'offline_dt': now,  # For display only
+            'offline_monotonic': now_monotonic,  # For duration math, immune to clock changes
             'record_index': len(self.outage_data[location]) - 1  # Index of the record we just added
         }
         
-        logging.warning(f"OUTAGE STARTED: {location} ({ip}) went offline at {now.strftime('%H:%M:%S')}")
+        if logging.getLogger().isEnabledFor(logging.WARNING):
+            logging.warning("OUTAGE STARTED: %s (%s) went offline at %s",
+                            location, ip, now.strftime('%H:%M:%S'))
     
-    def _record_outage_end(self, ip: str):
-        """Record when a device comes back online"""
+    def _record_outage_end(self, ip: str, now: datetime, now_str: str, now_monotonic: float):
+        """Record when a device comes back online at cycle time now (now_str formatted)"""
         if ip not in self.active_outages:
             return
         
-        now = datetime.now()
         outage = self.active_outages.pop(ip)
         
         # Calculate offline duration
-        offline_duration = now.timestamp() - outage['offline_timestamp']
+        offline_duration = now_monotonic - outage['offline_monotonic']
         
         # Update the existing record in outage_data
         location = outage['location']
         record_index = outage['record_index']
         
         # Update the record we created when outage started
-        self.outage_data[location][record_index].update({
-            'online_at': self._format_timestamp(now),
+        record = self.outage_data[location][record_index]
+        record.update({
+            'online_at': now_str,
             'offline_for': self._format_duration(offline_duration)
         })
+        self._append_event({
+            'event': 'online',
+            'ip': ip,
+            'location': location,
+            'online_at': record['online_at'],
+            'offline_for': record['offline_for']
+        })
         
-        offline_time = self._parse_timestamp(outage['offline_at']).strftime('%H:%M:%S')
-        online_time = now.strftime('%H:%M:%S')
-        
-        logging.info(f"RECOVERY: {location} ({ip}) back online at {online_time} (was offline from {offline_time} - {self._format_duration(offline_duration)})")
+        # Skip formatting entirely if INFO records are dropped anyway
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            offline_time = outage['offline_dt'].strftime('%H:%M:%S')
+            online_time = now.strftime('%H:%M:%S')
+            logging.info("RECOVERY: %s (%s) back online at %s (was offline from %s - %s)",
+                         location, ip, online_time, offline_time, record['offline_for'])
     
     def _save_daily_data(self):
-        """Save outage data to daily JSON file"""
+        """Compact the day's outage data into the daily JSON summary file
+        
+        Events are appended to events_YYYYMMDD.jsonl as they happen; this
+        full rewrite only runs on day rollover and shutdown.
+        """
         try:
             outages_dir = Path("outages")
             outages_dir.mkdir(exist_ok=True)
             
             # Use current_day instead of recalculating to avoid confusion during rollover
             filename = outages_dir / f"outages_{self.current_day}.json"
-            
-            # Update ongoing outages with current duration before saving
-            current_time = datetime.now()
-            for ip, outage_info in self.active_outages.items():
-                location = outage_info['location']
-                record_index = outage_info['record_index']
-                offline_duration = current_time.timestamp() - outage_info['offline_timestamp']
-                
-                # Update the ongoing outage duration
-                self.outage_data[location][record_index]['offline_for'] = f"ONGOING ({self._format_duration(offline_duration)})"
-            
-            with open(filename, 'w') as f:
-                json.dump(self.outage_data, f, indent=2)
+            self._write_summary(filename, self.outage_data)
             
         except Exception as e:
-            logging.error(f"Error saving data: {e}")
+            logging.error("Error saving data: %s", e)
+    
+    def _write_summary(self, filename: Path, outage_data: Dict[str, List[dict]]):
+        """Atomically write outage data to a JSON summary file"""
+        # Write to a temp file first so readers never see a partial summary
+        tmp_filename = filename.with_suffix('.json.tmp')
+        with open(tmp_filename, 'wb') as f:
+            f.write(orjson.dumps(outage_data, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_filename, filename)
+    
+    def dump_current_state(self) -> Dict[str, List[dict]]:
+        """Return a copy of today's outage data with live ONGOING durations
+        
+        Saved files only mark ongoing outages as ONGOING; use this for
+        interactive inspection of how long they have lasted so far.
+        """
+        current_time = time.monotonic()
+        state = {location: [dict(record) for record in outages]
+                 for location, outages in self.outage_data.items()}
+        
+        for outage_info in self.active_outages.values():
+            offline_duration = current_time - outage_info['offline_monotonic']
+            record = state[outage_info['location']][outage_info['record_index']]
+            record['offline_for'] = f"ONGOING ({self._format_duration(offline_duration)})"
+        
+        return state
     
-    async def _monitor_all_devices(self):
-        """Monitor all devices in one cycle"""
-        tasks = []
-        for ip in self.devices.keys():
-            task = self._monitor_single_device(ip)
-            tasks.append(task)
-        
-        await asyncio.gather(*tasks, return_exceptions=True)
+    async def _monitor_all_devices(self, now: datetime, now_str: str, now_monotonic: float):
+        """Monitor all devices in one cycle started at now (now_str formatted)"""
+        results = await self._ping_devices(list(self.devices))
+        
+        # A single lost packet is not an outage: devices that would go
+        # offline get 3 more pings and only count as offline if all fail
+        suspects = [ip for ip, is_online in results.items()
+                    if not is_online and self.device_states.get(ip, True)]
+        if suspects:
+            # No confirmation (the batch failed) is not proof of an outage
+            confirmed = await self._ping_devices(suspects, count=3)
+            for ip in suspects:
+                results[ip] = confirmed.get(ip, True)
+        
+        # Only devices whose state may change need any further work
+        for ip, is_online in results.items():
+            if self.device_states.get(ip) != is_online:
+                self._monitor_single_device(ip, is_online, now, now_str, now_monotonic)
     
-    async def _monitor_single_device(self, ip: str):
-        """Monitor a single device"""
+    def _monitor_single_device(self, ip: str, is_online: bool, now: datetime, now_str: str, now_monotonic: float):
+        """Update state for a single device from its ping result"""
         location = self.devices[ip]
-        is_online = await self._ping_device(ip)
         previous_state = self.device_states.get(ip, True)
         
         # State change detection
         if previous_state and not is_online:
-            # Device went offline - confirm it
-            if await self._confirm_offline(ip):
-                self._record_outage_start(ip, location)
-                self.device_states[ip] = False
+            # Device went offline - none of its pings were answered
+            self._record_outage_start(ip, location, now, now_str, now_monotonic)
+            if ip in self.device_states:  # New devices were never counted online
+                self._online_count -= 1
+            self.device_states[ip] = False
         
         elif not previous_state and is_online:
             # Device came back online
-            self._record_outage_end(ip)
+            self._record_outage_end(ip, now, now_str, now_monotonic)
             self.device_states[ip] = True
+            self._online_count += 1
         
         elif ip not in self.device_states:
-            # First time checking this device
-            self.device_states[ip] = is_online
-            if not is_online:
-                # Device is offline from startup
-                if await self._confirm_offline(ip):
-                    self._record_outage_start(ip, location)
+            # First time checking this device - it is online
+            self.device_states[ip] = True
+            self._online_count += 1
     
     async def start_monitoring(self):
         """Start the monitoring process"""
@@ -319,36 +590,45 @@ class SimpleNetworkMonitor:
         print(f"Ping interval: {self.ping_interval} seconds")
         print("Press Ctrl+C to stop\n")
         
+        self._shutdown_event = asyncio.Event()
+        self._setup_signal_handlers()
+        
         try:
-            while not self.shutdown_requested:
-                # Check for day rollover before each monitoring cycle
-                self._check_day_rollover()
-                
-                start_time = time.time()
+            while not self._shutdown_event.is_set():
+                # Timestamp the whole cycle once instead of per device/event
+                cycle_now = datetime.now()
+                cycle_now_str = self._format_timestamp(cycle_now)
+                # Taken with cycle_now so durations match the recorded timestamps
+                cycle_monotonic = time.monotonic()
                 
-                # Monitor all devices
-                await self._monitor_all_devices()
+                # Check for day rollover before each monitoring cycle
+                self._check_day_rollover(cycle_now)
                 
-                # Save data every cycle
-                self._save_daily_data()
+                # Monitor all devices - outage events are logged as they happen
+                await self._monitor_all_devices(cycle_now, cycle_now_str, cycle_monotonic)
                 
                 # Show status
-                online = sum(1 for state in self.device_states.values() if state)
+                online = self._online_count
                 offline = len(self.device_states) - online
                 active_outages = len(self.active_outages)
                 
-                elapsed = time.time() - start_time
+                elapsed = time.monotonic() - cycle_monotonic
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] Online: {online}, Offline: {offline}, Active outages: {active_outages} (scan took {elapsed:.1f}s)")
                 
-                # Wait for next cycle
-                await asyncio.sleep(max(0, self.ping_interval - elapsed))
+                # Wait for next cycle, or until shutdown is requested
+                try:
+                    await asyncio.wait_for(self._shutdown_event.wait(),
+                                           timeout=max(0, self.ping_interval - elapsed))
+                except asyncio.TimeoutError:
+                    pass
         
         except Exception as e:
-            logging.error(f"Monitoring error: {e}")
+            logging.error("Monitoring error: %s", e)
         
         finally:
             # Final save and summary
             self._save_daily_data()
+            self._close_event_log()
             self._print_summary()
     
     def _print_summary(self):
@@ -374,8 +654,12 @@ def main():
         # Configuration
         CSV_FILE = 'devices.csv'
         PING_INTERVAL = 3  # seconds
+        MAX_CONCURRENT_PINGS = 64
+        
+        monitor = SimpleNetworkMonitor(CSV_FILE, PING_INTERVAL, MAX_CONCURRENT_PINGS)
         
-        monitor = SimpleNetworkMonitor(CSV_FILE, PING_INTERVAL)
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
         asyncio.run(monitor.start_monitoring())
         
     except KeyboardInterrupt:
@@ -1,47 +1,149 @@
-import pandas as pd
-import platform
+import os
+import shutil
 import subprocess
+import sys
 from concurrent.futures import ThreadPoolExecutor
 
+import xlsxwriter
+from icmplib import ICMPv4Socket, NameLookupError, SocketPermissionError, is_hostname, multiping, resolve
+from openpyxl import load_workbook
 
-def ping_ip(ip):
-    """Ping the given IP and return whether it's alive or dead."""
+# Same for every batch - bound once at import instead of per call.
+# Root can use raw ICMP sockets; everyone else needs unprivileged ones.
+PING_OPTIONS = {"count": 1, "timeout": 1, "privileged": hasattr(os, "geteuid") and os.geteuid() == 0}
+
+# System ping command, used only when ICMP sockets and fping are unavailable
+PING_CMD = ["ping", "-n", "1", "-w", "1000"] if sys.platform == "win32" else ["ping", "-c", "1", "-W", "1"]
+
+
+def detect_ping_method():
+    """Return "icmplib" if ICMP sockets can be opened, else "fping" or "ping"."""
     try:
-        os_name = platform.system().lower()
-        if "windows" in os_name:
-            result = subprocess.run(["ping", "-n", "1", "-w", "1000", ip],
-                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        else:
-            result = subprocess.run(["ping", "-c", "1", "-W", "1", ip],
-                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return "ALIVE" if result.returncode == 0 else "DEAD"
+        ICMPv4Socket(privileged=PING_OPTIONS["privileged"]).close()
+        return "icmplib"
+    except SocketPermissionError:
+        pass
+
+    for method in ("fping", "ping"):
+        if shutil.which(method):
+            print(f"No permission for ICMP sockets, using {method} instead")
+            return method
+
+    raise RuntimeError("Cannot ping: no permission for ICMP sockets and neither fping nor ping is installed")
+
+
+def fping_ips(ips):
+    """Ping a list of IPs with a single fping process and return {ip: status}."""
+    result = subprocess.run(["fping", "-a", "-q", "-r", "0", "-t", "1000", *ips],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # fping exits 1 if some hosts are unreachable and 2 if some names
+    # could not be resolved; anything higher is a real failure
+    if result.returncode > 2:
+        error = result.stderr.decode(errors="replace").strip()
+        return {ip: f"Error: {error}" for ip in ips}
+
+    alive = set(result.stdout.decode().split())  # -a prints the targets that answered
+    return {ip: "ALIVE" if ip in alive else "DEAD" for ip in ips}
+
+
+def command_ping_ips(ips, max_workers=10):
+    """Ping a list of IPs with one system ping process each and return {ip: status}."""
+    def ping_one(ip):
+        try:
+            result = subprocess.run([*PING_CMD, ip], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return "ALIVE" if result.returncode == 0 else "DEAD"
+        except Exception as e:
+            return f"Error: {e}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(ips, executor.map(ping_one, ips)))
+
+
+def ping_ips(ips, max_workers=10, method="icmplib"):
+    """Ping a list of IPs in one batch and return ALIVE/DEAD for each."""
+    unique_ips = list(dict.fromkeys(ips))  # Ping repeated IPs only once
+    if method == "fping":
+        statuses = fping_ips(unique_ips)
+        return [statuses[ip] for ip in ips]
+    if method == "ping":
+        statuses = command_ping_ips(unique_ips, max_workers)
+        return [statuses[ip] for ip in ips]
+
+    statuses = {}
+    try:
+        try:
+            hosts = multiping(unique_ips, concurrent_tasks=max_workers, **PING_OPTIONS)
+        except NameLookupError:
+            # One unresolvable name fails the whole batch - flag the names
+            # that don't resolve and ping the rest in a new batch
+            for ip in unique_ips:
+                if is_hostname(ip):
+                    try:
+                        resolve(ip)
+                    except NameLookupError as e:
+                        statuses[ip] = f"Error: {e}"
+            unique_ips = [ip for ip in unique_ips if ip not in statuses]
+            hosts = multiping(unique_ips, concurrent_tasks=max_workers, **PING_OPTIONS)
+        statuses.update((ip, "ALIVE" if host.is_alive else "DEAD") for ip, host in zip(unique_ips, hosts))
     except Exception as e:
-        return f"Error: {e}"
+        statuses.update((ip, f"Error: {e}") for ip in unique_ips if ip not in statuses)
+    return [statuses[ip] for ip in ips]
+
 
+def process_sheet(rows, max_workers=10, method="icmplib"):
+    """Ping IPs in the sheet rows (header first) and update the STATUS column."""
+    if not rows or "IP" not in rows[0]:
+        return rows
 
-def process_sheet(sheet):
-    """Ping IPs in the sheet and update the STATUS column."""
-    if "IP" in sheet.columns:
-        sheet["STATUS"] = sheet["IP"].apply(ping_ip)
-    return sheet
+    header = list(rows[0])
+    if "STATUS" not in header:
+        header.append("STATUS")
+    ip_col = header.index("IP")
+    status_col = header.index("STATUS")
+
+    # Pad short rows so every row has a STATUS cell
+    data = [list(row) + [None] * (len(header) - len(row)) for row in rows[1:]]
+
+    # Rows without an IP get a blank STATUS instead of pinging "None"
+    targets = []
+    for row in data:
+        ip = "" if row[ip_col] is None else str(row[ip_col]).strip()
+        if ip:
+            targets.append((row, ip))
+        else:
+            row[status_col] = None
+
+    statuses = ping_ips([ip for _, ip in targets], max_workers, method)
+    for (row, _), status in zip(targets, statuses):
+        row[status_col] = status
+    return [header] + data
 
 
 def process_excel(file_path, output_path, max_workers=10):
     """Read Excel file, ping IPs, update STATUS, and save the result."""
-    writer = pd.ExcelWriter(output_path, engine="openpyxl")  # Output file
-    sheets = pd.read_excel(file_path, sheet_name=None)  # Read all sheets
+    method = detect_ping_method()  # Fails before touching any file if nothing can ping
+    workbook = load_workbook(file_path, read_only=True, data_only=True)  # Streamed input
+    output = xlsxwriter.Workbook(output_path, {
+        "constant_memory": True,  # Rows flushed to disk as written
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",  # Otherwise dates are bare serial numbers
+    })
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(process_sheet, sheet): name for name, sheet in sheets.items()}
-        for future in futures:
-            sheet_name = futures[future]
-            try:
-                updated_sheet = future.result()
-                updated_sheet.to_excel(writer, sheet_name=sheet_name, index=False)
-            except Exception as e:
-                print(f"Error processing sheet {sheet_name}: {e}")
-
-    writer.close()  # Use close() instead of save()
+    for worksheet in workbook.worksheets:
+        try:
+            rows = list(worksheet.iter_rows(values_only=True))
+            # Read-only sheets can report trailing empty rows; blank rows in
+            # between are kept so the output lines up with the input
+            while rows and all(cell is None for cell in rows[-1]):
+                rows.pop()
+            updated_rows = process_sheet(rows, max_workers, method)
+            output_sheet = output.add_worksheet(worksheet.title)
+            for row_index, row in enumerate(updated_rows):
+                output_sheet.write_row(row_index, 0, row)
+        except Exception as e:
+            print(f"Error processing sheet {worksheet.title}: {e}")
+
+    workbook.close()
+    output.close()
     print(f"Updated Excel saved at: {output_path}")
 
 